@@ -4,6 +4,12 @@ Schema defines sections and keys in order; keys containing PASSWORD or API_KEY u
 """
 from __future__ import annotations
 
+import copy
+import functools
+import io
+import mmap
+import re
+import sys
 from configparser import ConfigParser
 from pathlib import Path
 from typing import Any
@@ -11,6 +17,20 @@ from typing import Any
 
 # Delimiter for form field names: "section||key" (section may contain spaces; key does not)
 FORM_SEP = "||"
+# Prefix of every config value field name: FORM_PREFIX + form_section + FORM_SEP + key
+FORM_PREFIX = "v" + FORM_SEP
+
+# Whole-file INI scanner: group 1 = "[section]", groups 2/3 = "key = value" (inline # comment dropped),
+# group 4 = any other non-blank, non-comment line, which is handed to ConfigParser instead
+_INI_RE = re.compile(
+    rb"^\[([^\]\r\n]+)\][ \t]*\r?$"
+    rb"|^([^=:;#\s\[][^=:\r\n]*?)[ \t]*=[ \t]*([^#\r\n]*?)[ \t]*(?:#[^\r\n]*)?\r?$"
+    rb"|^[ \t]*([^\s#;])",
+    re.MULTILINE,
+)
+
+# Parsed + merged sections per config path, keyed by (st_mtime_ns, st_size) of the file when parsed
+_cache: dict[Path, tuple[int, int, list[dict[str, Any]]]] = {}
 
 
 # Section-level help text (from Config.ini comments)
@@ -75,19 +95,81 @@ def _get_section_hint(section: str) -> str:
     return SECTION_HINTS.get(section, "")
 
 
+@functools.lru_cache(maxsize=256)
 def _is_password_key(key: str) -> bool:
     k = key.upper()
     return "PASSWORD" in k or "API_KEY" in k or "SECRET" in k or k in ("APPLEPWD",)
 
 
+_SECTION_TO_FORM = str.maketrans({" ": "_"})
+_FORM_TO_SECTION = str.maketrans({"_": " "})
+
+
 def _section_to_form(section: str) -> str:
     """Section name for use in form field names (spaces to underscores)."""
-    return section.replace(" ", "_")
+    return section.translate(_SECTION_TO_FORM)
 
 
 def _form_to_section(form_section: str) -> str:
     """Restore section name from form (underscores to spaces)."""
-    return form_section.replace("_", " ")
+    return form_section.translate(_FORM_TO_SECTION)
+
+
+def _scan_sections(buf: mmap.mmap) -> list[tuple[str, dict[str, str]]] | None:
+    """
+    Scan INI bytes made only of section headers, key = value lines, comments and blank lines.
+    Values have inline comments removed. Returns None on anything else (continuation lines,
+    ':' delimiters, duplicates, DEFAULT) so the caller can fall back to ConfigParser.
+    Raises UnicodeDecodeError on invalid UTF-8.
+    """
+    sections: list[tuple[str, dict[str, str]]] = []
+    names: set[str] = set()
+    options: dict[str, str] | None = None
+    for m in _INI_RE.finditer(buf):
+        section, key, value, other = m.groups()
+        if key is not None:
+            key = key.decode("utf-8").strip()
+            if options is None or key in options:
+                return None
+            options[key] = value.decode("utf-8").strip()
+        elif section is not None:
+            name = sys.intern(section.decode("utf-8"))
+            if name in names or name == "DEFAULT":
+                return None
+            names.add(name)
+            options = {}
+            sections.append((name, options))
+        else:
+            return None
+    return sections
+
+
+def _read_sections(path: Path) -> list[tuple[str, dict[str, str]]] | None:
+    """Memory-map path and scan it with _scan_sections (None means use ConfigParser)."""
+    with open(path, "rb") as f:
+        if not f.seek(0, 2):
+            return []  # mmap cannot map an empty file
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        return _scan_sections(mm)
+    finally:
+        mm.close()
+
+
+def _read_with_config_parser(path: Path) -> list[tuple[str, dict[str, str]]] | None:
+    """Read path with ConfigParser (values with inline comments removed); returns None if the file cannot be parsed."""
+    cp = ConfigParser()
+    cp.optionxform = str  # preserve key case (e.g. SYNOLOGY_URL not synology_url)
+    try:
+        cp.read(path, encoding="utf-8")
+    except Exception:
+        return None
+    return [
+        (section, {key: _strip_inline_comment(cp.get(section, key, raw=True)) for key in cp.options(section)})
+        for section in cp.sections()
+    ]
 
 
 def parse_config(path: Path) -> list[dict[str, Any]]:
@@ -98,29 +180,30 @@ def parse_config(path: Path) -> list[dict[str, Any]]:
     if not path.exists():
         return _default_sections_structure()
 
-    cp = ConfigParser()
-    cp.optionxform = str  # preserve key case (e.g. SYNOLOGY_URL not synology_url)
     try:
-        cp.read(path, encoding="utf-8")
-    except Exception:
+        parsed = _read_sections(path)
+    except (OSError, ValueError):  # ValueError includes UnicodeDecodeError
         return _default_sections_structure()
+    if parsed is None:
+        parsed = _read_with_config_parser(path)
+        if parsed is None:
+            return _default_sections_structure()
 
     sections_out = []
-    for section in cp.sections():
+    for section, options in parsed:
+        form_section = _section_to_form(section)
         keys_out = []
-        for key in cp.options(section):
-            raw_value = cp.get(section, key, raw=True)
-            value = _strip_inline_comment(raw_value)
+        for key, value in options.items():
             keys_out.append({
                 "key": key,
                 "value": value,
                 "is_password": _is_password_key(key),
-                "form_section": _section_to_form(section),
+                "form_section": form_section,
                 "hint": _get_option_hint(section, key),
             })
         sections_out.append({
             "name": section,
-            "form_section": _section_to_form(section),
+            "form_section": form_section,
             "hint": _get_section_hint(section),
             "options": keys_out,
         })
@@ -129,139 +212,145 @@ def parse_config(path: Path) -> list[dict[str, Any]]:
     return sections_out
 
 
-def _default_sections_structure() -> list[dict[str, Any]]:
+def _schema_section(name: str, options: list[tuple[str, str, bool]]) -> dict[str, Any]:
+    """One schema section; options are (key, default value, is_password) and share the section's form_section."""
+    name = sys.intern(name)
+    form_section = _section_to_form(name)
+    return {
+        "name": name,
+        "form_section": form_section,
+        "hint": _get_section_hint(name),
+        "options": [
+            {"key": key, "value": value, "is_password": is_password, "form_section": form_section, "hint": _get_option_hint(name, key)}
+            for key, value, is_password in options
+        ],
+    }
+
+
+def _build_default_sections_structure() -> list[dict[str, Any]]:
     """Default sections and keys when file is missing (matches Config.ini layout)."""
     return [
-        {"name": "Google Takeout", "form_section": _section_to_form("Google Takeout"), "hint": _get_section_hint("Google Takeout"), "options": []},
-        {
-            "name": "Synology Photos",
-            "form_section": _section_to_form("Synology Photos"),
-            "hint": _get_section_hint("Synology Photos"),
-            "options": [
-                {"key": "SYNOLOGY_URL", "value": "", "is_password": False, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_URL")},
-                {"key": "SYNOLOGY_USERNAME_1", "value": "", "is_password": False, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_USERNAME_1")},
-                {"key": "SYNOLOGY_PASSWORD_1", "value": "", "is_password": True, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_PASSWORD_1")},
-                {"key": "SYNOLOGY_USERNAME_2", "value": "", "is_password": False, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_USERNAME_2")},
-                {"key": "SYNOLOGY_PASSWORD_2", "value": "", "is_password": True, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_PASSWORD_2")},
-                {"key": "SYNOLOGY_USERNAME_3", "value": "", "is_password": False, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_USERNAME_3")},
-                {"key": "SYNOLOGY_PASSWORD_3", "value": "", "is_password": True, "form_section": _section_to_form("Synology Photos"), "hint": _get_option_hint("Synology Photos", "SYNOLOGY_PASSWORD_3")},
-            ],
-        },
-        {
-            "name": "Immich Photos",
-            "form_section": _section_to_form("Immich Photos"),
-            "hint": _get_section_hint("Immich Photos"),
-            "options": [
-                {"key": "IMMICH_URL", "value": "", "is_password": False, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_URL")},
-                {"key": "IMMICH_API_KEY_ADMIN", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_API_KEY_ADMIN")},
-                {"key": "IMMICH_API_KEY_USER_1", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_API_KEY_USER_1")},
-                {"key": "IMMICH_USERNAME_1", "value": "", "is_password": False, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_USERNAME_1")},
-                {"key": "IMMICH_PASSWORD_1", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_PASSWORD_1")},
-                {"key": "IMMICH_API_KEY_USER_2", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_API_KEY_USER_2")},
-                {"key": "IMMICH_USERNAME_2", "value": "", "is_password": False, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_USERNAME_2")},
-                {"key": "IMMICH_PASSWORD_2", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_PASSWORD_2")},
-                {"key": "IMMICH_API_KEY_USER_3", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_API_KEY_USER_3")},
-                {"key": "IMMICH_USERNAME_3", "value": "", "is_password": False, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_USERNAME_3")},
-                {"key": "IMMICH_PASSWORD_3", "value": "", "is_password": True, "form_section": _section_to_form("Immich Photos"), "hint": _get_option_hint("Immich Photos", "IMMICH_PASSWORD_3")},
-            ],
-        },
-        {
-            "name": "Apple Photos",
-            "form_section": _section_to_form("Apple Photos"),
-            "hint": _get_section_hint("Apple Photos"),
-            "options": [
-                {"key": "appleid", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "appleid")},
-                {"key": "applepwd", "value": "", "is_password": True, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "applepwd")},
-                {"key": "album", "value": "all", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "album")},
-                {"key": "to_directory", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "to_directory")},
-                {"key": "date_from", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "date_from")},
-                {"key": "date_to", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "date_to")},
-                {"key": "asset_from", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "asset_from")},
-                {"key": "asset_to", "value": "", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "asset_to")},
-                {"key": "max_photos", "value": "10000", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "max_photos")},
-                {"key": "shared_library", "value": "PrimarySync", "is_password": False, "form_section": _section_to_form("Apple Photos"), "hint": _get_option_hint("Apple Photos", "shared_library")},
-            ],
-        },
-        {"name": "Google Photos", "form_section": _section_to_form("Google Photos"), "hint": _get_section_hint("Google Photos"), "options": []},
-        {
-            "name": "TimeZone",
-            "form_section": _section_to_form("TimeZone"),
-            "hint": _get_section_hint("TimeZone"),
-            "options": [
-                {"key": "timezone", "value": "US/Central", "is_password": False, "form_section": _section_to_form("TimeZone"), "hint": _get_option_hint("TimeZone", "timezone")},
-            ],
-        },
+        _schema_section("Google Takeout", []),
+        _schema_section("Synology Photos", [
+            ("SYNOLOGY_URL", "", False),
+            ("SYNOLOGY_USERNAME_1", "", False),
+            ("SYNOLOGY_PASSWORD_1", "", True),
+            ("SYNOLOGY_USERNAME_2", "", False),
+            ("SYNOLOGY_PASSWORD_2", "", True),
+            ("SYNOLOGY_USERNAME_3", "", False),
+            ("SYNOLOGY_PASSWORD_3", "", True),
+        ]),
+        _schema_section("Immich Photos", [
+            ("IMMICH_URL", "", False),
+            ("IMMICH_API_KEY_ADMIN", "", True),
+            ("IMMICH_API_KEY_USER_1", "", True),
+            ("IMMICH_USERNAME_1", "", False),
+            ("IMMICH_PASSWORD_1", "", True),
+            ("IMMICH_API_KEY_USER_2", "", True),
+            ("IMMICH_USERNAME_2", "", False),
+            ("IMMICH_PASSWORD_2", "", True),
+            ("IMMICH_API_KEY_USER_3", "", True),
+            ("IMMICH_USERNAME_3", "", False),
+            ("IMMICH_PASSWORD_3", "", True),
+        ]),
+        _schema_section("Apple Photos", [
+            ("appleid", "", False),
+            ("applepwd", "", True),
+            ("album", "all", False),
+            ("to_directory", "", False),
+            ("date_from", "", False),
+            ("date_to", "", False),
+            ("asset_from", "", False),
+            ("asset_to", "", False),
+            ("max_photos", "10000", False),
+            ("shared_library", "PrimarySync", False),
+        ]),
+        _schema_section("Google Photos", []),
+        _schema_section("TimeZone", [
+            ("timezone", "US/Central", False),
+        ]),
     ]
 
 
+# Built once at import; treat as read-only and copy before handing out
+_DEFAULT_SCHEMA_TEMPLATE: list[dict[str, Any]] = _build_default_sections_structure()
+
+
+def _default_sections_structure() -> list[dict[str, Any]]:
+    """Fresh, mutable copy of the default sections and keys."""
+    return copy.deepcopy(_DEFAULT_SCHEMA_TEMPLATE)
+
+
 def _merge_parsed_with_schema(parsed: list[dict], schema: list[dict]) -> list[dict]:
-    """Merge parsed file sections with schema so we have all keys, with values from file when present."""
-    by_name = {s["name"]: s for s in parsed}
+    """
+    Merge parsed file sections with schema so we have all keys, with values from file when present.
+    The schema is not modified; option dicts in the result are copies.
+    """
+    parsed_values = {s["name"]: {o["key"]: o["value"] for o in s["options"]} for s in parsed}
     out = []
     for sect in schema:
-        name = sect["name"]
-        schema_keys = {k["key"]: k for k in sect["options"]}
-        if name in by_name:
-            for k in by_name[name]["options"]:
-                if k["key"] in schema_keys:
-                    schema_keys[k["key"]]["value"] = k["value"]
-        keys_out = list(schema_keys.values())
-        for k in keys_out:
-            k["form_section"] = _section_to_form(name)
-        out.append({"name": name, "form_section": _section_to_form(name), "hint": _get_section_hint(name), "options": keys_out})
+        values = parsed_values.get(sect["name"], {})
+        options = [{**opt, "value": values.get(opt["key"], opt["value"])} for opt in sect["options"]]
+        out.append({"name": sect["name"], "form_section": sect["form_section"], "hint": sect["hint"], "options": options})
     return out
 
 
 def parse_config_with_schema(path: Path) -> list[dict[str, Any]]:
-    """Parse file and merge with default schema so all known keys appear; use file values when present."""
-    schema = _default_sections_structure()
-    if not path.exists():
-        return schema
+    """
+    Parse file and merge with default schema so all known keys appear; use file values when present.
+    Results are cached per path and reused while the file's mtime and size are unchanged.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return _default_sections_structure()
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return copy.deepcopy(cached[2])
+
     parsed = parse_config(path)
-    if not parsed:
-        return schema
-    return _merge_parsed_with_schema(parsed, schema)
+    sections = _merge_parsed_with_schema(parsed, _DEFAULT_SCHEMA_TEMPLATE) if parsed else _default_sections_structure()
+    _cache[path] = (st.st_mtime_ns, st.st_size, copy.deepcopy(sections))
+    return sections
+
+
+def invalidate_config_cache(path: Path) -> None:
+    """Drop the cached parse for path (call after writing the file)."""
+    _cache.pop(path, None)
 
 
 def build_ini_from_form(form_data: dict[str, str]) -> str:
     """
-    Rebuild INI content from form data. Form keys must be "v" + FORM_SEP + form_section + FORM_SEP + key.
+    Rebuild INI content from form data. Form keys must be FORM_PREFIX + form_section + FORM_SEP + key.
     All schema sections are emitted in order; keys come from form_data.
     """
-    prefix = "v" + FORM_SEP
-    # Collect (section, key) -> value from form
-    by_section: dict[str, list[tuple[str, str]]] = {}
+    plen = len(FORM_PREFIX)
+    # Collect section -> {key: value} from form
+    value_by_section_key: dict[str, dict[str, str]] = {}
     for form_key, value in form_data.items():
-        if not form_key.startswith(prefix) or FORM_SEP not in form_key[len(prefix):]:
+        if form_key[:plen] != FORM_PREFIX:
             continue
-        rest = form_key[len(prefix):]
-        parts = rest.split(FORM_SEP, 1)
-        if len(parts) != 2:
+        form_section, sep, key = form_key[plen:].partition(FORM_SEP)
+        if not sep or not key:
             continue
-        form_section, key = parts
         section = _form_to_section(form_section)
-        value = (value or "").strip()
-        if section not in by_section:
-            by_section[section] = []
-        by_section[section].append((key, value))
-
-    schema = _default_sections_structure()
-    lines = ["# Config.ini File", ""]
-    value_by_section_key: dict[str, dict[str, str]] = {}
-    for section, pairs in by_section.items():
-        value_by_section_key[section] = dict(pairs)
-    for sect in schema:
+        vals = value_by_section_key.get(section)
+        if vals is None:
+            vals = value_by_section_key[section] = {}
+        vals[key] = (value or "").strip()
+
+    out = io.StringIO()
+    out.write("# Config.ini File\n")
+    for sect in _DEFAULT_SCHEMA_TEMPLATE:
         name = sect["name"]
         vals = value_by_section_key.get(name, {})
-        lines.append(f"[{name}]")
+        out.write(f"\n[{name}]\n")
         for key_info in sect["options"]:
             k = key_info["key"]
-            v = vals.get(k, "")
-            lines.append(f"{k} = {v}")
-        lines.append("")
-    return "\n".join(lines).strip() + "\n"
+            out.write(f"{k} = {vals.get(k, '')}\n")
+    return out.getvalue()
 
 
 def form_field_name(form_section: str, key: str) -> str:
     """Name attribute for the form input."""
-    return "v" + FORM_SEP + form_section + FORM_SEP + key
+    return FORM_PREFIX + form_section + FORM_SEP + key
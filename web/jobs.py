@@ -4,11 +4,19 @@ Jobs are created when a task is started; status and logs are updated by the runn
 """
 from __future__ import annotations
 
+import asyncio
+import threading
+import time
 import uuid
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from typing import List
+from itertools import islice
+from typing import Deque, List
+
+# Log lines kept per job (ring buffer); older lines are dropped and counted in Job.log_offset
+MAX_LOG_LINES = 50_000
 
 
 class JobStatus(str, Enum):
@@ -18,14 +26,21 @@ class JobStatus(str, Enum):
     FAILED = "failed"
 
 
+def _iso_from_ns(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+
 @dataclass
 class Job:
     id: str
     mode: str
     status: JobStatus
-    created_at: datetime
-    updated_at: datetime
-    log_lines: List[str] = field(default_factory=list)
+    created_at_ns: int  # time.time_ns(); converted to ISO only in to_dict()
+    updated_at_ns: int
+    log_lines: Deque[str] = field(default_factory=lambda: deque(maxlen=MAX_LOG_LINES))
+    log_offset: int = 0  # number of lines evicted from the front of log_lines
+    # Guards log_lines/log_offset: the runner appends from its thread while requests read
+    log_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
     error: str | None = None
     result_summary: str | None = None
 
@@ -34,30 +49,32 @@ class Job:
             "id": self.id,
             "mode": self.mode,
             "status": self.status.value,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
+            "created_at": _iso_from_ns(self.created_at_ns),
+            "updated_at": _iso_from_ns(self.updated_at_ns),
             "log_lines_count": len(self.log_lines),
             "error": self.error,
             "result_summary": self.result_summary,
         }
 
 
+# Insertion-ordered, so iteration order is creation order
 _jobs: dict[str, Job] = {}
-_job_order: List[str] = []
+# Live log subscribers per job, as (event loop, queue) pairs; changed and fed under the job's log_lock
+_subscribers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+_TERMINAL_STATUSES = frozenset({JobStatus.DONE, JobStatus.FAILED})
 
 
 def create_job(mode: str) -> Job:
     job_id = str(uuid.uuid4())
-    now = datetime.utcnow()
+    now = time.time_ns()
     job = Job(
         id=job_id,
         mode=mode,
         status=JobStatus.PENDING,
-        created_at=now,
-        updated_at=now,
+        created_at_ns=now,
+        updated_at_ns=now,
     )
     _jobs[job_id] = job
-    _job_order.append(job_id)
     return job
 
 
@@ -66,24 +83,123 @@ def get_job(job_id: str) -> Job | None:
 
 
 def list_jobs(limit: int = 50) -> List[Job]:
-    order = _job_order[-limit:] if limit else _job_order
-    order = order[::-1]
-    return [_jobs[jid] for jid in order if jid in _jobs]
+    """Most recent jobs first; limit <= 0 returns all."""
+    return list(islice(reversed(_jobs.values()), limit if limit > 0 else None))
 
 
 def update_job_status(job_id: str, status: JobStatus, error: str | None = None, result_summary: str | None = None) -> None:
+    try:
+        job = _jobs[job_id]
+    except KeyError:
+        return
+    job.status = status
+    job.updated_at_ns = time.time_ns()
+    if error is not None:
+        job.error = error
+    if result_summary is not None:
+        job.result_summary = result_summary
+
+
+def append_job_log_batch(job_id: str, lines: List[str]) -> None:
+    """Append log lines to the job; lines evicted from the ring buffer are counted in log_offset."""
+    try:
+        job = _jobs[job_id]
+    except KeyError:
+        return
+    with job.log_lock:
+        _extend_log_locked(job, lines)
+    job.updated_at_ns = time.time_ns()
+
+
+def _extend_log_locked(job: Job, lines: List[str]) -> None:
+    """Append lines to the job's ring buffer; caller holds job.log_lock."""
+    log_lines = job.log_lines
+    start = job.log_offset + len(log_lines)
+    overflow = len(log_lines) + len(lines) - log_lines.maxlen
+    if overflow > 0:
+        job.log_offset += overflow
+    log_lines.extend(lines)
+    _publish_locked(job.id, (start, lines))
+
+
+def _publish_locked(job_id: str, item: tuple[int, List[str]] | None) -> None:
+    """Hand item to every subscriber of the job on its own event loop; caller holds job.log_lock."""
+    for loop, q in _subscribers.get(job_id, ()):
+        try:
+            loop.call_soon_threadsafe(q.put_nowait, item)
+        except RuntimeError:
+            pass  # loop already closed
+
+
+def subscribe(job_id: str) -> asyncio.Queue | None:
+    """
+    Queue that receives (start_index, lines) for every batch appended to the job's log from now on,
+    then None once the job has finished (at once if it already has). Call from the event loop;
+    release with unsubscribe(). None if the job does not exist.
+    """
+    try:
+        job = _jobs[job_id]
+    except KeyError:
+        return None
+    q: asyncio.Queue = asyncio.Queue()
+    with job.log_lock:
+        if job.status in _TERMINAL_STATUSES:
+            q.put_nowait(None)
+        else:
+            _subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), q))
+    return q
+
+
+def unsubscribe(job_id: str, q: asyncio.Queue) -> None:
     job = _jobs.get(job_id)
-    if job:
+    if job is None:
+        return
+    with job.log_lock:
+        subs = _subscribers.get(job_id)
+        if subs:
+            _subscribers[job_id] = [s for s in subs if s[1] is not q]
+            if not _subscribers[job_id]:
+                del _subscribers[job_id]
+
+
+def finalize_job(
+    job_id: str,
+    status: JobStatus,
+    *,
+    error: str | None = None,
+    result_summary: str | None = None,
+    final_lines: List[str] | None = None,
+) -> None:
+    """Record a terminal status, plus any last log lines, in one critical section."""
+    try:
+        job = _jobs[job_id]
+    except KeyError:
+        return
+    with job.log_lock:
+        if final_lines:
+            _extend_log_locked(job, final_lines)
         job.status = status
-        job.updated_at = datetime.utcnow()
         if error is not None:
             job.error = error
         if result_summary is not None:
             job.result_summary = result_summary
-
-
-def append_job_log(job_id: str, line: str) -> None:
-    job = _jobs.get(job_id)
-    if job:
-        job.log_lines.append(line)
-        job.updated_at = datetime.utcnow()
+        job.updated_at_ns = time.time_ns()
+        _publish_locked(job_id, None)
+        _subscribers.pop(job_id, None)
+
+
+def log_end(job: Job) -> int:
+    """Absolute index following the job's last log line (lines dropped from the ring buffer included)."""
+    with job.log_lock:
+        return job.log_offset + len(job.log_lines)
+
+
+def read_job_log(job: Job, since: int = 0) -> tuple[int, List[str]]:
+    """
+    Log lines from absolute index `since` onwards (lines already dropped from the ring buffer are skipped)
+    and the index following the last line, to pass as `since` next time.
+    """
+    with job.log_lock:
+        offset = job.log_offset
+        lines = list(islice(job.log_lines, max(0, since - offset), None))
+        return offset + len(job.log_lines), lines
@@ -1,63 +1,72 @@
 """
-PhotoMigrator web interface: FastAPI app, job queue worker, and routes.
+PhotoMigrator web interface: FastAPI app and routes; jobs run on the runner's worker thread.
 Run from project root: uv run --group web python -m web.main
 """
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import queue
-import threading
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Annotated
 
+import jinja2
 from fastapi import FastAPI, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
+from sse_starlette import EventSourceResponse
 from starlette.requests import Request
 from starlette.templating import Jinja2Templates
 
 from web import jobs
-from web.runner import run_mode
+from web.runner import start_job_worker, stop_job_worker, submit_job
 from web.schemas import (
     GoogleTakeoutRequest,
     AutomaticMigrationRequest,
-    api_to_args,
+    GoogleTakeoutForm,
+    AutomaticMigrationForm,
 )
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
 STATIC_DIR = Path(__file__).resolve().parent / "static"
+# Changes on every start, so config page ETags from an older process (templates, schema) never match
+_PROCESS_TOKEN = f"{time.time_ns():x}"
 
-# Job queue: (job_id, mode, args_dict)
-_job_queue: queue.Queue = queue.Queue()
 
-
-def _worker():
-    while True:
-        try:
-            item = _job_queue.get()
-            if item is None:
-                break
-            job_id, mode, args_dict = item
-            run_mode(job_id, mode, args_dict)
-        except Exception:
-            pass
-        finally:
-            _job_queue.task_done()
+def _submit(job: jobs.Job, args: dict) -> None:
+    """Queue job for the runner; a full queue fails the job and answers 429."""
+    try:
+        submit_job(job.id, job.mode, args)
+    except queue.Full:
+        jobs.finalize_job(job.id, jobs.JobStatus.FAILED, error="Job queue is full")
+        raise HTTPException(status_code=429, detail="Too many pending jobs, try again later")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    t = threading.Thread(target=_worker, daemon=True)
-    t.start()
+    if templates is not None:
+        # Compile templates up front so the first request does not pay for it
+        for name in templates.env.list_templates(extensions=["html"]):
+            templates.get_template(name)
+    start_job_worker()
     yield
-    _job_queue.put(None)
+    stop_job_worker()
 
 
 app = FastAPI(title="PhotoMigrator Web", lifespan=lifespan)
 
 if TEMPLATES_DIR.exists():
-    templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+    # Templates ship with the app: keep every compiled template and never re-stat the files
+    templates = Jinja2Templates(env=jinja2.Environment(
+        loader=jinja2.FileSystemLoader(str(TEMPLATES_DIR)),
+        autoescape=True,
+        auto_reload=False,
+        cache_size=-1,
+    ))
 else:
     templates = None
 
@@ -71,11 +80,11 @@ if STATIC_DIR.exists():
 def start_google_takeout(body: GoogleTakeoutRequest):
     """Start a Google Takeout processing job."""
     job = jobs.create_job("google-takeout")
-    args = api_to_args("google-takeout", body.model_dump())
+    args = body.to_args()
     args["google-takeout"] = body.takeout_folder
     if body.output_folder:
         args["output-folder"] = body.output_folder
-    _job_queue.put((job.id, "google-takeout", args))
+    _submit(job, args)
     return {"job_id": job.id}
 
 
@@ -83,48 +92,37 @@ def start_google_takeout(body: GoogleTakeoutRequest):
 def start_automatic_migration(body: AutomaticMigrationRequest):
     """Start an automatic migration job (source -> target)."""
     job = jobs.create_job("automatic-migration")
-    args = api_to_args("automatic-migration", body.model_dump())
+    args = body.to_args()
     args["source"] = body.source
     args["target"] = body.target
-    _job_queue.put((job.id, "automatic-migration", args))
+    _submit(job, args)
     return {"job_id": job.id}
 
 
 # --- Form submit (HTML forms post here; redirect to job page) ---
 
 @app.post("/jobs/google-takeout")
-def form_google_takeout(
-    takeout_folder: str = Form(..., alias="takeout_folder"),
-    output_folder: str = Form(""),
-    google_skip_gpth_tool: str = Form(""),
-):
+def form_google_takeout(form: Annotated[GoogleTakeoutForm, Form()]):
     job = jobs.create_job("google-takeout")
     args = _default_args()
-    args["google-takeout"] = takeout_folder
-    if output_folder:
-        args["output-folder"] = output_folder
-    args["google-skip-gpth-tool"] = (google_skip_gpth_tool or "").lower() in ("true", "1", "yes")
-    _job_queue.put((job.id, "google-takeout", args))
+    args["google-takeout"] = form.takeout_folder
+    if form.output_folder:
+        args["output-folder"] = form.output_folder
+    args["google-skip-gpth-tool"] = form.google_skip_gpth_tool
+    _submit(job, args)
     return RedirectResponse(url=f"/job/{job.id}", status_code=303)
 
 
 @app.post("/jobs/automatic-migration")
-def form_automatic_migration(
-    source: str = Form(..., alias="source"),
-    target: str = Form(..., alias="target"),
-    move_assets: str = Form(""),
-    dashboard: str = Form(""),
-    parallel_migration: str = Form(""),
-):
-    def b(v): return (v or "").lower() in ("true", "1", "yes")
+def form_automatic_migration(form: Annotated[AutomaticMigrationForm, Form()]):
     job = jobs.create_job("automatic-migration")
     args = _default_args()
-    args["source"] = source
-    args["target"] = target
-    args["move-assets"] = b(move_assets)
-    args["dashboard"] = b(dashboard) if dashboard != "" else True
-    args["parallel-migration"] = b(parallel_migration) if parallel_migration != "" else True
-    _job_queue.put((job.id, "automatic-migration", args))
+    args["source"] = form.source
+    args["target"] = form.target
+    args["move-assets"] = form.move_assets
+    args["dashboard"] = form.dashboard
+    args["parallel-migration"] = form.parallel_migration
+    _submit(job, args)
     return RedirectResponse(url=f"/job/{job.id}", status_code=303)
 
 
@@ -149,12 +147,53 @@ def get_job_api(job_id: str):
 
 
 @app.get("/api/jobs/{job_id}/logs")
-def get_job_logs(job_id: str):
-    """Get full log lines for a job (for polling)."""
+def get_job_logs(job_id: str, since: int = 0):
+    """
+    Get log lines for a job (for polling). Returns lines from absolute index `since` onwards
+    and `next`, the index to pass as `since` on the following poll. `dropped` counts lines that fell
+    out of the job's log ring buffer.
+    """
     job = jobs.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return {"job_id": job_id, "lines": job.log_lines}
+    next_index, lines = jobs.read_job_log(job, since)
+    return {"job_id": job_id, "next": next_index, "dropped": job.log_offset, "lines": lines}
+
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job_logs(request: Request, job_id: str, since: int = 0):
+    """
+    Server-sent events with the job's log: `log` events carry {"next", "lines"} (lines from `since`, then each
+    new batch as it is appended); a final `end` event carries {"status"}. Event ids are `next` values, so a
+    reconnecting EventSource resumes from its Last-Event-ID.
+    """
+    job = jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    last_id = request.headers.get("last-event-id", "")
+    if last_id.isdigit():
+        since = int(last_id)
+    # Subscribe before reading the backlog so no batch is missed; overlap is skipped by index below
+    q = jobs.subscribe(job_id)
+
+    async def events():
+        try:
+            next_index, lines = jobs.read_job_log(job, since)
+            if lines:
+                yield {"event": "log", "id": str(next_index), "data": json.dumps({"next": next_index, "lines": lines})}
+            while (item := await q.get()) is not None:
+                start, lines = item
+                end = start + len(lines)
+                if end <= next_index:
+                    continue
+                lines = lines[max(0, next_index - start):]
+                next_index = end
+                yield {"event": "log", "id": str(next_index), "data": json.dumps({"next": next_index, "lines": lines})}
+            yield {"event": "end", "data": json.dumps({"status": job.status.value})}
+        finally:
+            jobs.unsubscribe(job_id, q)
+
+    return EventSourceResponse(events())
 
 
 # --- Pages ---
@@ -176,11 +215,12 @@ async def job_detail(request: Request, job_id: str):
     job = jobs.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    log_next, log_lines = jobs.read_job_log(job)
     if templates is None:
-        return HTMLResponse(f"<pre>Job {job_id}\nStatus: {job.status}\n\n" + "\n".join(job.log_lines) + "</pre>")
+        return HTMLResponse(f"<pre>Job {job_id}\nStatus: {job.status}\n\n" + "\n".join(log_lines) + "</pre>")
     return templates.TemplateResponse(
         "job_detail.html",
-        {"request": request, "job": job, "job_id": job_id},
+        {"request": request, "job": job, "job_id": job_id, "log_lines": log_lines, "log_next": log_next},
     )
 
 
@@ -198,43 +238,65 @@ async def config_page(request: Request, saved: str = ""):
     from web.config_ini import parse_config_with_schema, form_field_name
 
     path = _config_path()
-    sections = parse_config_with_schema(path)
     writable = path.exists() and os.access(path, os.W_OK)
     if not path.exists() and path.parent.exists() and os.access(path.parent, os.W_OK):
         writable = True
+
+    # Page only depends on file content, writability and this process's templates: answer 304 while none has changed
+    try:
+        st = path.stat()
+    except OSError:
+        etag = None
+    else:
+        etag = f'W/"{_PROCESS_TOKEN}-{st.st_mtime_ns:x}-{st.st_size:x}-{int(writable)}"'
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    sections = await asyncio.to_thread(parse_config_with_schema, path)
     if templates is None:
-        return HTMLResponse(
+        response = HTMLResponse(
             f"<h1>Configuration</h1><p>Path: {path}</p><p>{len(sections)} sections</p>",
             status_code=200,
         )
-    return templates.TemplateResponse(
-        "config.html",
-        {
-            "request": request,
-            "config_path": str(path),
-            "sections": sections,
-            "form_field_name": form_field_name,
-            "saved": saved == "1",
-            "writable": writable,
-        },
-    )
+    else:
+        response = templates.TemplateResponse(
+            "config.html",
+            {
+                "request": request,
+                "config_path": str(path),
+                "sections": sections,
+                "form_field_name": form_field_name,
+                "saved": saved == "1",
+                "writable": writable,
+            },
+        )
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return response
 
 
 @app.post("/config")
 async def config_save(request: Request):
     """Save Config.ini from structured form (all form fields with prefix v||)."""
-    from web.config_ini import build_ini_from_form, FORM_SEP
+    from web.config_ini import build_ini_from_form, invalidate_config_cache, FORM_PREFIX
 
     path = _config_path()
     if not path.parent.exists():
         raise HTTPException(status_code=500, detail="Config directory does not exist")
     form = await request.form()
-    form_data = {k: (v if isinstance(v, str) else "") for k, v in form.items() if k.startswith("v" + FORM_SEP)}
+    plen = len(FORM_PREFIX)
+    form_data = {}
+    for k, v in form.multi_items():
+        if k[:plen] == FORM_PREFIX:
+            form_data[k] = v if isinstance(v, str) else ""
     content = build_ini_from_form(form_data)
     try:
-        path.write_text(content, encoding="utf-8")
+        await asyncio.to_thread(path.write_text, content, encoding="utf-8")
     except OSError as e:
         raise HTTPException(status_code=500, detail=f"Cannot write config: {e}")
+    finally:
+        invalidate_config_cache(path)
     return RedirectResponse(url="/config?saved=1", status_code=303)
 
 
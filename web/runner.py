@@ -1,193 +1,480 @@
 """
 Runs PhotoMigrator execution modes with request-scoped ARGS and captures logs to a job.
 Must run in a dedicated thread; only one job should run at a time (global state).
+submit_job() queues a job for the single pm-job worker thread, which calls run_mode().
 """
 from __future__ import annotations
 
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
+from collections import deque
 from pathlib import Path
 from typing import Any
 
+from pydantic import ConfigDict, ValidationError, create_model
+
 # Ensure project root and src are on path before importing Core/Features
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 SRC_ROOT = PROJECT_ROOT / "src"
-if str(SRC_ROOT) not in sys.path:
-    sys.path.insert(0, str(SRC_ROOT))
-if str(PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(PROJECT_ROOT))
+_PATHS_INITIALIZED = False
+
+
+def _init_paths() -> None:
+    """Put PROJECT_ROOT, then SRC_ROOT, at the front of sys.path (those not already on it), once."""
+    global _PATHS_INITIALIZED
+    if _PATHS_INITIALIZED:
+        return
+    on_path = set(sys.path)
+    sys.path[:0] = [p for p in (str(PROJECT_ROOT), str(SRC_ROOT)) if p not in on_path]
+    _PATHS_INITIALIZED = True
+
+
+_init_paths()
+
+from web import jobs
+
+# Core/Features are imported lazily by _ensure_core_loaded() (first run_mode call), after the
+# path setup above and so web dependencies stay optional until the runner is used
+_core_lock = threading.Lock()
+_core_loaded = False
+_GV = None
+_checkArgs = None
+_set_GLOBAL_VARIABLES = None
+_set_HELP_TEXTS = None
+_set_LOGGER = None
+_mode_google_takeout = None
+_mode_AUTOMATIC_MIGRATION = None
+
+
+def _ensure_core_loaded() -> None:
+    """Import the Core modules run_mode needs, once per process."""
+    global _core_loaded, _GV, _checkArgs, _set_GLOBAL_VARIABLES, _set_HELP_TEXTS, _set_LOGGER
+    global _mode_google_takeout, _mode_AUTOMATIC_MIGRATION
+    if _core_loaded:
+        return
+    with _core_lock:
+        if _core_loaded:
+            return
+        import Core.GlobalVariables as GV
+        from Core.ArgsParser import checkArgs
+        from Core.GlobalFunctions import set_GLOBAL_VARIABLES, set_HELP_TEXTS, set_LOGGER
+        from Core.ExecutionModes import mode_google_takeout, mode_AUTOMATIC_MIGRATION
+
+        _GV = GV
+        _checkArgs = checkArgs
+        _set_GLOBAL_VARIABLES = set_GLOBAL_VARIABLES
+        _set_HELP_TEXTS = set_HELP_TEXTS
+        _set_LOGGER = set_LOGGER
+        _mode_google_takeout = mode_google_takeout
+        _mode_AUTOMATIC_MIGRATION = mode_AUTOMATIC_MIGRATION
+        _log_listener.start()
+        _core_loaded = True
+
+
+def _config_file_default() -> str:
+    """Config.ini path: env PHOTOMIGRATOR_CONFIG_PATH or project root (read per call so env changes apply)."""
+    return os.environ.get("PHOTOMIGRATOR_CONFIG_PATH", "") or str(PROJECT_ROOT / "Config.ini")
+
+
+# ArgsParser defaults (kebab-case keys), built once; _default_args() adds "configuration-file" per call
+_DEFAULTS: dict[str, Any] = {
+    "no-request-user-confirmation": True,
+    "no-log-file": False,
+    "log-level": "info",
+    "log-format": "log",
+    "date-separator": "-",
+    "range-separator": "--",
+    "foldername-albums": "",
+    "foldername-no-albums": "",
+    "foldername-logs": "",
+    "foldername-duplicates-output": "",
+    "foldername-extracted-dates": "",
+    "exec-gpth-tool": "",
+    "exec-exif-tool": "",
+    "input-folder": "",
+    "output-folder": "",
+    "client": "google-takeout",
+    "account-id": 1,
+    "filter-from-date": None,
+    "filter-to-date": None,
+    "filter-by-type": None,
+    "filter-by-country": None,
+    "filter-by-city": None,
+    "filter-by-person": None,
+    "albums-folders": [],
+    "remove-albums-assets": False,
+    "source": "",
+    "target": "",
+    "move-assets": False,
+    "dashboard": True,
+    "parallel-migration": True,
+    "google-takeout": "",
+    "google-output-folder-suffix": "processed",
+    "google-albums-folders-structure": "flatten",
+    "google-no-albums-folders-structure": "year/month",
+    "google-ignore-check-structure": False,
+    "google-no-symbolic-albums": False,
+    "google-remove-duplicates-files": False,
+    "google-rename-albums-folders": False,
+    "google-skip-extras-files": False,
+    "google-skip-move-albums": False,
+    "google-skip-gpth-tool": False,
+    "google-skip-preprocess": False,
+    "google-skip-postprocess": False,
+    "google-keep-takeout-folder": False,
+    "show-gpth-info": True,
+    "show-gpth-errors": True,
+    "gpth-no-log": False,
+    "upload-albums": "",
+    "download-albums": [],
+    "upload-all": "",
+    "download-all": "",
+    "rename-albums": [],
+    "remove-albums": "",
+    "remove-all-albums": False,
+    "remove-all-assets": False,
+    "remove-empty-albums": False,
+    "remove-duplicates-albums": False,
+    "merge-duplicates-albums": False,
+    "remove-orphan-assets": False,
+    "one-time-password": False,
+    "fix-symlinks-broken": "",
+    "rename-folders-content-based": "",
+    "find-duplicates": ["list", ""],
+    "process-duplicates": "",
+    "google-input-zip-folder": None,
+    "AUTOMATIC-MIGRATION": None,
+    "duplicates-folders": [],
+    "duplicates-action": "list",
+}
+# Keys whose default is a list: copied per call so jobs never share a mutable default
+_LIST_DEFAULT_KEYS = tuple(k for k, v in _DEFAULTS.items() if isinstance(v, list))
+# Every key _default_args() returns; API keys outside this set are ignored
+_VALID_KEYS = frozenset(_DEFAULTS) | {"configuration-file"}
+
+
+def _arg_type(default: Any) -> Any:
+    if default is None:
+        return Any
+    return list[str] if isinstance(default, list) else type(default)
+
+
+# Type check for ARGS before checkArgs, built once from _DEFAULTS: one field per key (snake_case name,
+# kebab-case alias), typed after its default. Strict, so e.g. "true" is not taken for a bool.
+_ArgsModel = create_model(
+    "_ArgsModel",
+    __config__=ConfigDict(alias_generator=lambda name: name.replace("_", "-"), strict=True),
+    configuration_file=(str, ...),
+    **{k.replace("-", "_"): (_arg_type(v), v) for k, v in _DEFAULTS.items()},
+)
 
-# Lazy imports of Core/Features inside run_mode to avoid importing before path is set
-# and to keep web dependencies optional until runner is used
+
+def _validation_message(e: ValidationError) -> str:
+    """ValidationError as one line, like checkArgs messages: "key: problem; key: problem"."""
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
 
 
 def _default_args() -> dict[str, Any]:
     """Build default ARGS dict matching ArgsParser defaults (kebab-case keys)."""
-    return {
-        "configuration-file": os.environ.get("PHOTOMIGRATOR_CONFIG_PATH", "") or str(PROJECT_ROOT / "Config.ini"),
-        "no-request-user-confirmation": True,
-        "no-log-file": False,
-        "log-level": "info",
-        "log-format": "log",
-        "date-separator": "-",
-        "range-separator": "--",
-        "foldername-albums": "",
-        "foldername-no-albums": "",
-        "foldername-logs": "",
-        "foldername-duplicates-output": "",
-        "foldername-extracted-dates": "",
-        "exec-gpth-tool": "",
-        "exec-exif-tool": "",
-        "input-folder": "",
-        "output-folder": "",
-        "client": "google-takeout",
-        "account-id": 1,
-        "filter-from-date": None,
-        "filter-to-date": None,
-        "filter-by-type": None,
-        "filter-by-country": None,
-        "filter-by-city": None,
-        "filter-by-person": None,
-        "albums-folders": [],
-        "remove-albums-assets": False,
-        "source": "",
-        "target": "",
-        "move-assets": False,
-        "dashboard": True,
-        "parallel-migration": True,
-        "google-takeout": "",
-        "google-output-folder-suffix": "processed",
-        "google-albums-folders-structure": "flatten",
-        "google-no-albums-folders-structure": "year/month",
-        "google-ignore-check-structure": False,
-        "google-no-symbolic-albums": False,
-        "google-remove-duplicates-files": False,
-        "google-rename-albums-folders": False,
-        "google-skip-extras-files": False,
-        "google-skip-move-albums": False,
-        "google-skip-gpth-tool": False,
-        "google-skip-preprocess": False,
-        "google-skip-postprocess": False,
-        "google-keep-takeout-folder": False,
-        "show-gpth-info": True,
-        "show-gpth-errors": True,
-        "gpth-no-log": False,
-        "upload-albums": "",
-        "download-albums": [],
-        "upload-all": "",
-        "download-all": "",
-        "rename-albums": [],
-        "remove-albums": "",
-        "remove-all-albums": False,
-        "remove-all-assets": False,
-        "remove-empty-albums": False,
-        "remove-duplicates-albums": False,
-        "merge-duplicates-albums": False,
-        "remove-orphan-assets": False,
-        "one-time-password": False,
-        "fix-symlinks-broken": "",
-        "rename-folders-content-based": "",
-        "find-duplicates": ["list", ""],
-        "process-duplicates": "",
-        "google-input-zip-folder": None,
-        "AUTOMATIC-MIGRATION": None,
-        "duplicates-folders": [],
-        "duplicates-action": "list",
-    }
+    out = {"configuration-file": _config_file_default(), **_DEFAULTS}
+    for k in _LIST_DEFAULT_KEYS:
+        out[k] = list(out[k])
+    return out
 
 
 def _merge_api_args(default: dict, api_args: dict) -> dict:
-    """Merge API payload (kebab-case) into default; only set keys that are in api_args."""
-    out = dict(default)
-    for k, v in api_args.items():
-        if k in out:
-            out[k] = v
-    return out
+    """Merge API payload (kebab-case) into default in place and return it; only known ARGS keys are taken."""
+    default.update((k, api_args[k]) for k in api_args.keys() & _VALID_KEYS)
+    return default
+
+
+def _ensure_list(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [value] if value else []
+
+
+def _normalize_find_duplicates(value) -> list:
+    # Parser shape is [action, folder, ...]; a bare folder means the default "list" action
+    if isinstance(value, list):
+        return value
+    return ["list", value] if value else ["list", ""]
+
+
+# List-typed ARGS given in the API body, mapped to the function that coerces them to the parser's shape
+_NORMALIZERS = {
+    "find-duplicates": _normalize_find_duplicates,
+    "download-albums": _ensure_list,
+}
+
+
+class _MockParser:
+    """Stands in for argparse's parser in checkArgs: raises instead of exit() so the job fails cleanly."""
+
+    def error(self, msg):
+        raise ValueError(msg)
+
+
+_MOCK_PARSER = _MockParser()
+
+
+# Max records waiting for the job log listener; a full queue blocks the logging thread instead of dropping records
+_LOG_QUEUE_SIZE = 10000
+
+
+class _BlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that waits for room in a bounded queue rather than failing with queue.Full."""
+
+    def enqueue(self, record):
+        self.queue.put(record)
+
+
+class _JobLogFormatter(logging.Formatter):
+    """Formatter whose asctime runs strftime at most once per second; milliseconds are appended cheaply."""
+
+    def __init__(self, fmt=None, datefmt=None):
+        super().__init__(fmt, datefmt)
+        self._time_cache: tuple[int, str] = (-1, "")  # (whole second, formatted prefix), swapped as one tuple
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, prefix = self._time_cache
+        if second != cached_second:
+            prefix = time.strftime(datefmt or self.default_time_format, self.converter(record.created))
+            self._time_cache = (second, prefix)
+        # Same output as logging.Formatter: milliseconds only with the default date format
+        if datefmt or not self.default_msec_format:
+            return prefix
+        return self.default_msec_format % (prefix, record.msecs)
 
 
 class _JobLogHandler(logging.Handler):
-    """Logging handler that appends to a job's log buffer."""
+    """
+    Logging handler that buffers formatted lines for the job in record.job_id and passes them on in batches:
+    when batch_size lines are pending, flush_interval seconds after the first pending line, or when a
+    record for another job arrives.
+    """
 
-    def __init__(self, append_callback):
+    def __init__(self, append_batch_callback, batch_size: int = 256, flush_interval: float = 1.0):
         super().__init__()
-        self._append = append_callback
+        self._append_batch = append_batch_callback  # (job_id, lines)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._buffer: deque = deque()
+        self._buffer_job_id: str | None = None
+        self._timer: threading.Timer | None = None
 
     def emit(self, record):
         try:
             msg = self.format(record)
-            self._append(msg)
         except Exception:
             self.handleError(record)
+            return
+        with self.lock:
+            if record.job_id != self._buffer_job_id:
+                self.flush()
+                self._buffer_job_id = record.job_id
+            self._buffer.append(msg)
+            if len(self._buffer) >= self._batch_size:
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        # Appending under the handler lock keeps batches in order between the timer and emit()
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._buffer:
+                return
+            lines, self._buffer = list(self._buffer), deque()
+            try:
+                self._append_batch(self._buffer_job_id, lines)
+            except Exception:
+                # Drop the batch: raising here would end the listener thread (or the flush timer)
+                self.handleError(logging.makeLogRecord(
+                    {"msg": "Dropped %d log lines of job %s", "args": (len(lines), self._buffer_job_id)}))
+
+    def close(self):
+        self.flush()
+        super().close()
+
+
+# Job whose run_mode is in progress (only one runs at a time); None between jobs
+_active_job_id: str | None = None
+
+
+class _ActiveJobFilter(logging.Filter):
+    """
+    Stamps records with the running job's id and drops them while no job is running.
+    Not tied to the run_mode thread: Core logs from its own worker threads during a migration.
+    """
+
+    def filter(self, record):
+        job_id = _active_job_id
+        if job_id is None:
+            return False
+        record.job_id = job_id
+        return True
+
+
+_JOB_LOG_FORMATTER = _JobLogFormatter("%(asctime)s [%(levelname)s] %(message)s")
+
+# Job log pipeline, shared by all jobs: GV.LOGGER -> _JOB_LOG_HANDLER -> _log_queue -> listener thread
+# -> _JOB_LOG_SINK (format + batch) -> jobs.append_job_log_batch. The listener starts with the Core imports.
+_log_queue: queue.Queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+_JOB_LOG_HANDLER = _BlockingQueueHandler(_log_queue)
+_JOB_LOG_HANDLER.addFilter(_ActiveJobFilter())
+_JOB_LOG_SINK = _JobLogHandler(jobs.append_job_log_batch)
+_JOB_LOG_SINK.setFormatter(_JOB_LOG_FORMATTER)
+_log_listener = logging.handlers.QueueListener(_log_queue, _JOB_LOG_SINK, respect_handler_level=True)
+
+
+def _drain_job_logs() -> None:
+    """
+    Wait until the listener has handled every queued record, then flush the sink's buffer.
+    Like _log_queue.join(), but gives up if the listener thread is no longer running.
+    """
+    with _log_queue.all_tasks_done:
+        while _log_queue.unfinished_tasks:
+            thread = _log_listener._thread
+            if thread is None or not thread.is_alive():
+                break
+            _log_queue.all_tasks_done.wait(0.5)
+    _JOB_LOG_SINK.flush()
+
+
+def _log_job_record(logger: logging.Logger, msg: str, *args) -> None:
+    """
+    Send an INFO record straight to _JOB_LOG_HANDLER, past the logger's and the handler's level
+    (set from log-level), so a job's start/end records are kept even with log-level warning or error.
+    """
+    _JOB_LOG_HANDLER.handle(logger.makeRecord(logger.name, logging.INFO, __file__, 0, msg, args, None))
 
 
 def run_mode(job_id: str, mode: str, api_body: dict[str, Any]) -> None:
     """
     Run a single PhotoMigrator mode with ARGS built from api_body.
-    Updates job status and appends log lines via jobs.append_job_log(job_id, line).
+    Updates job status and appends log lines via jobs.append_job_log_batch(job_id, lines).
     """
-    from web import jobs
+    global _active_job_id
 
     jobs.update_job_status(job_id, jobs.JobStatus.RUNNING)
 
     try:
-        import Core.GlobalVariables as GV
-        from Core.ArgsParser import checkArgs
-        from Core.GlobalFunctions import set_GLOBAL_VARIABLES, set_HELP_TEXTS, set_LOGGER
-        from Core.ExecutionModes import mode_google_takeout, mode_AUTOMATIC_MIGRATION
+        _ensure_core_loaded()
+        GV = _GV
 
-        # Build ARGS: default + API body (keys already kebab-case from schemas.api_to_args)
-        default = _default_args()
-        ARGS = _merge_api_args(default, api_body)
+        # Build ARGS: default + API body (keys already kebab-case from the request model's to_args())
+        ARGS = _merge_api_args(_default_args(), api_body)
 
         # Normalize list types for parser compatibility
-        if "download-albums" in api_body and isinstance(ARGS.get("download-albums"), list):
-            pass  # already list
-        if "find-duplicates" in api_body:
-            fd = ARGS.get("find-duplicates")
-            if isinstance(fd, list):
-                ARGS["find-duplicates"] = fd
-            else:
-                ARGS["find-duplicates"] = ["list", fd] if fd else ["list", ""]
-
-        # Mock parser that raises instead of exit() so we can return 400
-        class MockParser:
-            def error(self, msg):
-                raise ValueError(msg)
+        for key, normalize in _NORMALIZERS.items():
+            if key in api_body:
+                ARGS[key] = normalize(ARGS[key])
 
         try:
-            checkArgs(ARGS, MockParser())
+            _ArgsModel.model_validate(ARGS)
+            _checkArgs(ARGS, _MOCK_PARSER)
+        except ValidationError as e:
+            jobs.finalize_job(job_id, jobs.JobStatus.FAILED, error=_validation_message(e))
+            return
         except ValueError as e:
-            jobs.update_job_status(job_id, jobs.JobStatus.FAILED, error=str(e))
+            jobs.finalize_job(job_id, jobs.JobStatus.FAILED, error=str(e))
             return
 
         # Set globals and init (same order as PhotoMigrator.PhotoMigrator)
         GV.ARGS = ARGS
-        set_GLOBAL_VARIABLES()
-        set_LOGGER()
-        set_HELP_TEXTS()
-
-        # Capture logs to job
-        def append_log(line: str):
-            jobs.append_job_log(job_id, line)
+        _set_GLOBAL_VARIABLES()
+        _set_LOGGER()
+        _set_HELP_TEXTS()
 
-        handler = _JobLogHandler(append_log)
-        handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
-        GV.LOGGER.addHandler(handler)
+        # Capture logs to job. set_LOGGER() rebuilds GV.LOGGER's handlers, so the shared handler is
+        # attached again here (addHandler ignores duplicates); it is never removed.
+        # set_LOGGER() also set GV.LOGGER to the requested level, so isEnabledFor() drops lower records
+        # before they are built (as long as callers log with %-style args, not f-strings). Give our handler
+        # the same level: Logger.callHandlers() then skips it, so below-threshold records are never queued.
+        _JOB_LOG_HANDLER.setLevel(GV.LOG_LEVEL)
+        GV.LOGGER.addHandler(_JOB_LOG_HANDLER)
+        _active_job_id = job_id
 
+        # One start and one end record per job, through the same handler as the mode's own output
+        job = jobs.get_job(job_id)
+        _log_job_record(GV.LOGGER, "Job %s started: mode=%s, pending_jobs=%d", job_id, mode, _pending_jobs.qsize())
+        _drain_job_logs()
+        first_line = jobs.log_end(job) if job else 0
+        started = time.perf_counter()
+        status = jobs.JobStatus.FAILED
         try:
             if mode == "google-takeout":
-                mode_google_takeout(user_confirmation=False)
+                _mode_google_takeout(user_confirmation=False)
             elif mode == "automatic-migration":
-                mode_AUTOMATIC_MIGRATION(show_gpth_info=ARGS.get("show-gpth-info", True))
+                _mode_AUTOMATIC_MIGRATION(show_gpth_info=ARGS.get("show-gpth-info", True))
             else:
                 raise ValueError(f"Unknown mode: {mode}")
+            status = jobs.JobStatus.DONE
         finally:
-            GV.LOGGER.removeHandler(handler)
+            # Drain first so the line count covers everything the mode logged
+            _drain_job_logs()
+            _log_job_record(GV.LOGGER, "Job %s finished: status=%s, elapsed=%.1fs, lines_emitted=%d",
+                            job_id, status.value, time.perf_counter() - started,
+                            jobs.log_end(job) - first_line if job else 0)
+            _active_job_id = None
+            _drain_job_logs()
 
-        jobs.update_job_status(job_id, jobs.JobStatus.DONE, result_summary="Completed successfully")
+        jobs.finalize_job(job_id, jobs.JobStatus.DONE, result_summary="Completed successfully")
 
     except Exception as e:
-        from web import jobs as j
-        j.append_job_log(job_id, f"Error: {e}")
-        j.update_job_status(job_id, j.JobStatus.FAILED, error=str(e))
+        jobs.finalize_job(job_id, jobs.JobStatus.FAILED, error=str(e), final_lines=[f"Error: {e}"])
+
+
+# --- Job worker ---
+
+# Jobs admitted but not started yet: (job_id, mode, api_body)
+_MAX_PENDING_JOBS = 64
+_pending_jobs: queue.Queue = queue.Queue(maxsize=_MAX_PENDING_JOBS)
+# Worker started by start_job_worker(): one daemon thread per process, kept apart from the event loop's
+# default pool so long runs never starve it, and not waited for at exit (a running job dies with the process)
+_worker_lock = threading.Lock()
+_worker_thread: threading.Thread | None = None
+
+
+def _job_worker() -> None:
+    while True:
+        job_id, mode, api_body = _pending_jobs.get()
+        try:
+            run_mode(job_id, mode, api_body)
+        except Exception:
+            pass
+
+
+def start_job_worker() -> None:
+    """Start the worker thread (no-op if it is already running)."""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(target=_job_worker, name="pm-job-worker", daemon=True)
+            _worker_thread.start()
+
+
+def stop_job_worker() -> None:
+    """Fail the jobs still waiting. The worker thread itself keeps running, so a later start_job_worker() reuses it."""
+    while True:
+        try:
+            job_id, _mode, _api_body = _pending_jobs.get_nowait()
+        except queue.Empty:
+            break
+        jobs.finalize_job(job_id, jobs.JobStatus.FAILED, error="Server shut down before the job started")
+
+
+def submit_job(job_id: str, mode: str, api_body: dict[str, Any]) -> None:
+    """Queue a job for the worker and return at once. Raises queue.Full when _MAX_PENDING_JOBS are waiting."""
+    _pending_jobs.put_nowait((job_id, mode, api_body))
@@ -1,14 +1,28 @@
 """
 Pydantic request/response models for the web API.
-API uses snake_case; runner maps to ARGS keys (kebab-case).
+API uses snake_case; request models dump to ARGS keys (kebab-case) through serialization aliases.
 """
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import AliasGenerator, BaseModel, ConfigDict, Field, ValidationInfo, field_validator
+
+
+def _to_kebab(field: str) -> str:
+    return field.replace("_", "-")
+
+
+class _ApiRequest(BaseModel):
+    """Base for JSON job requests: validated by field name, dumped by alias as ARGS keys (kebab-case)."""
+
+    model_config = ConfigDict(alias_generator=AliasGenerator(serialization_alias=_to_kebab))
+
+    def to_args(self) -> dict[str, Any]:
+        """ARGS-style dict (kebab-case keys) of the fields set in the request; runner merges with defaults."""
+        return self.model_dump(by_alias=True, exclude_unset=True)
 
 
 # --- Google Takeout ---
-class GoogleTakeoutRequest(BaseModel):
+class GoogleTakeoutRequest(_ApiRequest):
     takeout_folder: str = Field(..., description="Path to Google Takeout folder")
     output_folder: Optional[str] = Field(None, description="Output folder (default: <takeout>_processed_<timestamp>)")
     google_output_folder_suffix: str = Field("processed", description="Suffix for output folder")
@@ -29,7 +43,7 @@ class GoogleTakeoutRequest(BaseModel):
 
 
 # --- Automatic Migration ---
-class AutomaticMigrationRequest(BaseModel):
+class AutomaticMigrationRequest(_ApiRequest):
     source: str = Field(..., description="Source: path or immich-1, synology-2, etc.")
     target: str = Field(..., description="Target: path or immich-1, synology-2, etc.")
     move_assets: bool = False
@@ -39,30 +53,45 @@ class AutomaticMigrationRequest(BaseModel):
 
 
 # --- Upload/Download (cloud) ---
-class UploadAlbumsRequest(BaseModel):
+class UploadAlbumsRequest(_ApiRequest):
     albums_folder: str = Field(..., description="Path to folder containing album subfolders")
     client: str = Field("synology", description="synology | immich")
     account_id: int = Field(1, ge=1, le=3)
 
 
-class DownloadAlbumsRequest(BaseModel):
+class DownloadAlbumsRequest(_ApiRequest):
     output_folder: str = Field(..., description="Where to download")
     albums: list[str] = Field(..., description="Album names or ['ALL']")
     client: str = Field("synology", description="synology | immich")
     account_id: int = Field(1, ge=1, le=3)
 
 
-def api_to_args(mode: str, body: dict[str, Any]) -> dict[str, Any]:
-    """
-    Map API request body (snake_case) to ARGS-style dict (kebab-case keys).
-    Only includes keys present in body; runner will merge with defaults.
-    """
-    # Generic: snake_case -> kebab-case
-    def to_kebab(d: dict) -> dict:
-        out = {}
-        for k, v in d.items():
-            key = k.replace("_", "-")
-            out[key] = v
-        return out
-
-    return to_kebab(body)
+# --- HTML form submissions ---
+# Checkbox / text values treated as True (compared lower-cased)
+_TRUTHY = frozenset({"true", "1", "yes", "on", "y", "t"})
+
+
+class _FormModel(BaseModel):
+    """Base for HTML form bodies: bool fields accept checkbox strings; an empty string means the default."""
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _coerce_form_bool(cls, v: Any, info: ValidationInfo) -> Any:
+        field = cls.model_fields[info.field_name]
+        if field.annotation is bool and isinstance(v, str):
+            return v.lower() in _TRUTHY if v != "" else field.default
+        return v
+
+
+class GoogleTakeoutForm(_FormModel):
+    takeout_folder: str
+    output_folder: str = ""
+    google_skip_gpth_tool: bool = False
+
+
+class AutomaticMigrationForm(_FormModel):
+    source: str
+    target: str
+    move_assets: bool = False
+    dashboard: bool = True
+    parallel_migration: bool = True